@@ -4,13 +4,31 @@ Run: poetry run streamlit run app.py
 """
 
 import html
+import math
 from pathlib import Path
 
-import pandas as pd
+import numpy as np
 import streamlit as st
 
-from rando_scrapper.filtering import filter_hikes, filter_options
-from rando_scrapper.scraper import load_hikes_from_db
+from rando_scrapper.filtering import (
+    FILTERS,
+    build_indices,
+    filter_hikes_indexed,
+    filter_options,
+    hikes_frame,
+)
+from rando_scrapper.scraper import hike_raw_table, load_hikes_from_db
+
+# Summary table: hike field -> column header
+TABLE_COLUMNS = {
+    "title": "Randonnée",
+    "canton": "Canton",
+    "km_range": "Distance",
+    "duree_range": "Durée",
+    "difficulte": "Difficulté",
+    "environnement": "Environnement",
+    "type_parcours": "Type",
+}
 
 # Order of keys as on the site (for consistent display)
 INFO_TABLE_KEYS = [
@@ -31,8 +49,8 @@ INFO_TABLE_KEYS = [
 
 def _hike_info_table(hike: dict) -> list[tuple[str, str]]:
     """Build (key, value) rows for the info table. Prefer raw_table from site, else from fields."""
-    raw = hike.get("raw_table")
-    if isinstance(raw, dict) and raw:
+    raw = hike_raw_table(hike)
+    if raw:
         ordered = [(k, raw[k]) for k in INFO_TABLE_KEYS if k in raw]
         for k, v in raw.items():
             if k not in INFO_TABLE_KEYS:
@@ -66,8 +84,22 @@ def _hike_info_table(hike: dict) -> list[tuple[str, str]]:
     return rows
 
 
+def _hike_info_html(hike: dict) -> str:
+    """Info table as an HTML <table> (empty string if there is nothing to show)."""
+    table_rows = _hike_info_table(hike)
+    if not table_rows:
+        return ""
+    rows_html = "".join(
+        f"<tr><td>{html.escape(k)}</td><td>{html.escape(str(v))}</td></tr>"
+        for k, v in table_rows
+    )
+    return f"<table>{rows_html}</table>"
+
+
 # Default DB path
 DEFAULT_DB = Path(__file__).resolve().parent / "data" / "hikes.db"
+# Hikes rendered per page (only the current page's expanders are built)
+PAGE_SIZE = 20
 
 st.set_page_config(
     page_title="Randonnées Romandie",
@@ -77,92 +109,51 @@ st.set_page_config(
 )
 
 
-# Load data
-@st.cache_data
+# Load data (list of hikes + master DataFrame), one shared copy for all reruns/sessions
+# so the per-hike _info_html/raw_table memos persist
+@st.cache_resource
 def load_data(db_path: Path):
     if not db_path.exists():
         return None
-    return load_hikes_from_db(db_path)
+    hikes = load_hikes_from_db(db_path)
+    # Summary table headers applied once; filter columns (*_s, is_*, env_*) keep their names
+    return hikes, hikes_frame(hikes).rename(columns=TABLE_COLUMNS)
+
+
+# Filter bitmaps, built once per DB and shared across reruns/sessions
+@st.cache_resource
+def load_index(db_path: Path):
+    return build_indices(load_data(db_path)[1])
 
 
 db_path = DEFAULT_DB
-data = load_data(db_path)
+loaded = load_data(db_path)
 
-if data is None:
+if loaded is None:
     st.error(
         f"Aucune base de données trouvée dans `{db_path}`. "
         "Exécutez d’abord le scraper : `poetry run python scripts/run_scraper.py`"
     )
     st.stop()
 
+data, hikes_df = loaded
+index = load_index(db_path)
+
 # Sidebar: multi-select filters (expanded by default so mobile users see it)
 st.sidebar.title("🥾 Filtres")
 
 options = filter_options()
 
-# Map UI key -> (db field, selected list)
-selected = {}
-selected["Canton"] = st.sidebar.multiselect(
-    "Canton",
-    options=options["Canton"],
-    default=[],
-    key="canton",
-)
-selected["Type de parcours"] = st.sidebar.multiselect(
-    "Type de parcours",
-    options=options["Type de parcours"],
-    default=[],
-    key="type_parcours",
-)
-selected["Kilomètres"] = st.sidebar.multiselect(
-    "Kilomètres",
-    options=options["Kilomètres"],
-    default=[],
-    key="km",
-)
-selected["Durée"] = st.sidebar.multiselect(
-    "Durée",
-    options=options["Durée"],
-    default=[],
-    key="duree",
-)
-selected["Environnement"] = st.sidebar.multiselect(
-    "Environnement",
-    options=options["Environnement"],
-    default=[],
-    key="env",
-)
-selected["Difficulté"] = st.sidebar.multiselect(
-    "Difficulté",
-    options=options["Difficulté"],
-    default=[],
-    key="difficulte",
-)
-selected["Dénivelé positif"] = st.sidebar.multiselect(
-    "Dénivelé positif",
-    options=options["Dénivelé positif"],
-    default=[],
-    key="denivele",
-)
-selected["Saison"] = st.sidebar.multiselect(
-    "Saison",
-    options=options["Saison"],
-    default=[],
-    key="saison",
-)
+selected = {
+    label: st.sidebar.multiselect(label, options=options[label], default=[], key=key)
+    for label, key, _ in FILTERS
+}
 
-# Apply filters
-filtered = filter_hikes(
-    data,
-    cantons=selected["Canton"] or None,
-    types_parcours=selected["Type de parcours"] or None,
-    km_ranges=selected["Kilomètres"] or None,
-    duree_ranges=selected["Durée"] or None,
-    environnements=selected["Environnement"] or None,
-    difficultes=selected["Difficulté"] or None,
-    denivele_ranges=selected["Dénivelé positif"] or None,
-    saisons=selected["Saison"] or None,
+# Apply filters (empty selection = no filter on that dimension)
+mask = filter_hikes_indexed(
+    index, **{arg: selected[label] or None for label, _, arg in FILTERS}
 )
+filtered = [data[i] for i in np.flatnonzero(mask)]
 
 # Main area
 st.title("Randonnées en Suisse romande")
@@ -177,33 +168,24 @@ if not filtered:
     )
     st.stop()
 
-# Table + expandable details
-df = pd.DataFrame(filtered)
-columns_display = [
-    "title",
-    "canton",
-    "km_range",
-    "duree_range",
-    "difficulte",
-    "environnement",
-    "type_parcours",
-]
-cols_available = [c for c in columns_display if c in df.columns]
-df_display = df[cols_available].copy()
-df_display = df_display.rename(
-    columns={
-        "title": "Randonnée",
-        "canton": "Canton",
-        "km_range": "Distance",
-        "duree_range": "Durée",
-        "difficulte": "Difficulté",
-        "environnement": "Environnement",
-        "type_parcours": "Type",
-    }
+# Summary table (slice of the master DataFrame) + expandable details
+cols_available = [c for c in TABLE_COLUMNS.values() if c in hikes_df.columns]
+st.dataframe(hikes_df.loc[mask, cols_available], hide_index=True)
+
+# Pagination (page kept in st.session_state["page"])
+n_pages = math.ceil(len(filtered) / PAGE_SIZE)
+if n_pages > 1:
+    page = st.number_input(
+        f"Page (sur {n_pages})", min_value=1, max_value=n_pages, step=1, key="page"
+    )
+else:
+    page = 1
+start = (page - 1) * PAGE_SIZE
+st.caption(
+    f"Randonnées {start + 1}–{min(start + PAGE_SIZE, len(filtered))} sur {len(filtered)}"
 )
 
-for i, _row in df_display.iterrows():
-    hike = filtered[i]
+for hike in filtered[start : start + PAGE_SIZE]:
     title = hike.get("title") or "Sans titre"
     url = hike.get("url") or ""
     montee = hike.get("montee_m")
@@ -216,10 +198,8 @@ for i, _row in df_display.iterrows():
         st.markdown(f"[📄 Voir sur randoromandie.com]({url})")
         if hike.get("suisse_mobile_url"):
             st.markdown(f"[🗺 Carte SuisseMobile]({hike['suisse_mobile_url']})")
-        table_rows = _hike_info_table(hike)
-        if table_rows:
-            rows_html = "".join(
-                f"<tr><td>{html.escape(k)}</td><td>{html.escape(str(v))}</td></tr>"
-                for k, v in table_rows
-            )
-            st.markdown(f"<table>{rows_html}</table>", unsafe_allow_html=True)
+        # Built (and raw_table parsed) only for hikes actually rendered
+        if "_info_html" not in hike:
+            hike["_info_html"] = _hike_info_html(hike)
+        if hike["_info_html"]:
+            st.markdown(hike["_info_html"], unsafe_allow_html=True)
@@ -4,8 +4,15 @@ Filter hikes with multiple criteria (AND between dimensions).
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
 from rando_scrapper.scraper import (
+    CANONICAL_SEASONS,
     CANTONS,
+    CATEGORICAL_FIELDS,
     DENIVELE_RANGES,
     DIFFICULTES,
     DUREE_RANGES,
@@ -13,33 +20,38 @@ from rando_scrapper.scraper import (
     KM_RANGES,
     SEASONS,
     TYPE_PARCOURS,
+    hike_environnements,
+    parse_saison,
 )
 
-# Canonical season names (capitalization as displayed)
-_CANONICAL_SEASONS = {"Printemps", "Été", "Automne", "Hiver"}
-
-
-def _parse_saison(saison_str: str | None) -> set[str]:
-    """Parse saison string into set of canonical season names. 'Toute l'année' -> all 4."""
-    if not saison_str or not saison_str.strip():
-        return set()
-    s = saison_str.strip().lower().replace("\u2019", "'")  # unicode apostrophe
-    if "toute l'année" in s:
-        return _CANONICAL_SEASONS.copy()
-    result = set()
-    for part in saison_str.split(","):
-        part = part.strip().lower()
-        if not part:
-            continue
-        if "printemps" in part:
-            result.add("Printemps")
-        elif "été" in part or "ete" in part:
-            result.add("Été")
-        elif "automne" in part:
-            result.add("Automne")
-        elif "hiver" in part:
-            result.add("Hiver")
-    return result
+# Filter argument -> single-valued hike field it matches against
+_SINGLE_VALUE_FILTERS = {
+    "cantons": "canton",
+    "types_parcours": "type_parcours",
+    "km_ranges": "km_range",
+    "duree_ranges": "duree_range",
+    "difficultes": "difficulte",
+    "denivele_ranges": "denivele_range",
+}
+# Canonical season -> boolean column in the hikes DataFrame
+_SEASON_COLUMNS = {
+    "Printemps": "is_printemps",
+    "Été": "is_ete",
+    "Automne": "is_automne",
+    "Hiver": "is_hiver",
+}
+
+
+def _hike_seasons(h: dict) -> frozenset[str]:
+    """Canonical seasons of a hike: precomputed on load, else parsed."""
+    seasons = h.get("_season_set")
+    return seasons if seasons is not None else frozenset(parse_saison(h.get("saison")))
+
+
+def _hike_envs(h: dict) -> frozenset[str]:
+    """Environnements of a hike: precomputed on load, else parsed."""
+    envs = h.get("_envs")
+    return envs if envs is not None else frozenset(hike_environnements(h))
 
 
 def filter_hikes(
@@ -59,6 +71,8 @@ def filter_hikes(
     Within each group, a hike matches if it matches ANY of the selected values.
     For environnements: hike must have at least one of the selected environnements
     (in its environnements list or single environnement field).
+    Works on plain hike dicts; hikes from load_hikes_from_db reuse their precomputed
+    `_season_set` / `_envs` instead of re-parsing them.
     """
     if not hikes:
         return []
@@ -92,28 +106,139 @@ def filter_hikes(
         selected_s = set(saisons)
 
         def matches_saison(h: dict) -> bool:
-            raw = (h.get("saison") or "").strip().lower().replace("\u2019", "'")
-            if "toute l'année" in raw and "Toute l'année" in selected_s:
-                return True
-            hike_seasons = _parse_saison(h.get("saison"))
-            if "Toute l'année" in selected_s and _CANONICAL_SEASONS <= hike_seasons:
+            hike_seasons = _hike_seasons(h)
+            if "Toute l'année" in selected_s and CANONICAL_SEASONS <= hike_seasons:
                 return True
             return bool(hike_seasons & (selected_s - {"Toute l'année"}))
 
         result = [h for h in result if matches_saison(h)]
     if environnements:
+        selected_envs = frozenset(environnements)
+        # hike must have all selected envs
+        result = [h for h in result if selected_envs <= _hike_envs(h)]
 
-        def has_all_envs(h: dict, selected: list[str]) -> bool:
-            single = (h.get("environnement") or "").strip()
-            multi = (h.get("environnements") or "").strip()
-            hike_envs = {single} if single else set()
-            if multi:
-                hike_envs.update(e.strip() for e in multi.split(",") if e.strip())
-            return set(selected) <= hike_envs  # hike must have all selected envs
+    return result
 
-        result = [h for h in result if has_all_envs(h, environnements)]
 
-    return result
+def hikes_frame(hikes: list[dict]) -> pd.DataFrame:
+    """
+    Build a DataFrame view of hikes, typically from load_hikes_from_db (row i = hikes[i]).
+    Adds stripped copies of the single-valued filter fields (suffix `_s`), one
+    boolean column per canonical season and one `env_<name>` column per environnement.
+    Small-vocabulary fields are stored as pandas categoricals.
+    """
+    df = pd.DataFrame(hikes)
+    for field in CATEGORICAL_FIELDS:
+        if field in df.columns:
+            df[field] = df[field].astype("category")
+    for field in _SINGLE_VALUE_FILTERS.values():
+        if field in df.columns:
+            stripped = df[field].astype(object).fillna("").astype(str).str.strip()
+        else:
+            stripped = pd.Series("", index=df.index)
+        df[f"{field}_s"] = stripped.astype("category")
+    season_sets = [_hike_seasons(h) for h in hikes]
+    for season, col in _SEASON_COLUMNS.items():
+        df[col] = [season in s for s in season_sets]
+    env_sets = [_hike_envs(h) for h in hikes]
+    for env in sorted(set(ENVIRONNEMENTS).union(*env_sets)):
+        df[f"env_{env}"] = [env in e for e in env_sets]
+    return df
+
+
+@dataclass
+class HikeIndex:
+    """Membership bitmaps over a list of hikes: bitmaps[filter_arg][value][i]."""
+
+    size: int
+    bitmaps: dict[str, dict[str, np.ndarray]]
+    # Number of hikes per (filter, value), used to run selective filters first
+    counts: dict[str, dict[str, int]]
+
+
+def build_indices(df: pd.DataFrame) -> HikeIndex:
+    """
+    Precompute one boolean array per (filter, value) from a hikes_frame DataFrame.
+    Built once per DB load; filtering then only combines arrays.
+    """
+    bitmaps: dict[str, dict[str, np.ndarray]] = {}
+    for arg, field in _SINGLE_VALUE_FILTERS.items():
+        col = df[f"{field}_s"]
+        bitmaps[arg] = {value: (col == value).to_numpy() for value in col.unique()}
+    seasons = {
+        season: df[col].to_numpy(dtype=bool) for season, col in _SEASON_COLUMNS.items()
+    }
+    seasons["Toute l'année"] = np.logical_and.reduce(list(seasons.values()))
+    bitmaps["saisons"] = seasons
+    bitmaps["environnements"] = {
+        col.removeprefix("env_"): df[col].to_numpy(dtype=bool)
+        for col in df.columns
+        if col.startswith("env_")
+    }
+    counts = {
+        arg: {value: int(bitmap.sum()) for value, bitmap in values.items()}
+        for arg, values in bitmaps.items()
+    }
+    return HikeIndex(size=len(df), bitmaps=bitmaps, counts=counts)
+
+
+def filter_hikes_indexed(
+    index: HikeIndex,
+    *,
+    cantons: list[str] | None = None,
+    types_parcours: list[str] | None = None,
+    km_ranges: list[str] | None = None,
+    duree_ranges: list[str] | None = None,
+    environnements: list[str] | None = None,
+    difficultes: list[str] | None = None,
+    denivele_ranges: list[str] | None = None,
+    saisons: list[str] | None = None,
+) -> np.ndarray:
+    """
+    Same matching rules as filter_hikes, evaluated on a HikeIndex.
+    Returns a boolean mask over the indexed hikes (True = hike matches).
+    """
+    selections = {
+        "cantons": cantons,
+        "types_parcours": types_parcours,
+        "km_ranges": km_ranges,
+        "duree_ranges": duree_ranges,
+        "environnements": environnements,
+        "difficultes": difficultes,
+        "denivele_ranges": denivele_ranges,
+        "saisons": saisons,
+    }
+    active = {arg: values for arg, values in selections.items() if values}
+
+    def max_matches(arg: str) -> int:
+        counts = [index.counts[arg].get(v, 0) for v in active[arg]]
+        return min(counts) if arg == "environnements" else sum(counts)
+
+    mask = np.ones(index.size, dtype=bool)
+    no_match = np.zeros(index.size, dtype=bool)
+    # Most selective filter first, so an empty result is reached as early as possible
+    for arg in sorted(active, key=max_matches):
+        arrays = [index.bitmaps[arg].get(v, no_match) for v in active[arg]]
+        # Environnements: hike must have all selected values; other filters: any
+        combine = np.logical_and if arg == "environnements" else np.logical_or
+        mask &= combine.reduce(arrays)
+        if not mask.any():
+            break
+    return mask
+
+
+# Filter dimensions: (label in filter_options(), UI widget key, filter_hikes /
+# filter_hikes_indexed keyword argument)
+FILTERS = [
+    ("Canton", "canton", "cantons"),
+    ("Type de parcours", "type_parcours", "types_parcours"),
+    ("Kilomètres", "km", "km_ranges"),
+    ("Durée", "duree", "duree_ranges"),
+    ("Environnement", "env", "environnements"),
+    ("Difficulté", "difficulte", "difficultes"),
+    ("Dénivelé positif", "denivele", "denivele_ranges"),
+    ("Saison", "saison", "saisons"),
+]
 
 
 def filter_options() -> dict[str, list[str]]:
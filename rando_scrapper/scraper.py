@@ -5,17 +5,39 @@ Scraper for randoromandie.com — collects all hike posts and parses their detai
 import json
 import re
 import sqlite3
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
+import lxml.etree
+import lxml.html
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "https://randoromandie.com"
 # Match WordPress date-based post URLs: /2026/02/09/slug/
 POST_URL_PATTERN = re.compile(r"^/\d{4}/\d{2}/\d{2}/[^/]+/?$")
+# Value parsers for the info table: "3h06", "3.5 h", "12,5 km", "1 050 m"
+_DUREE_HM = re.compile(r"(\d+)\s*h\s*(\d+)?")
+_DUREE_NUM = re.compile(r"([\d.]+)\s*h?")
+_NUM_KM = re.compile(r"([\d.,]+)\s*km", re.I)
+_NUM_M = re.compile(r"([\d\s]+)\s*m", re.I)
+# Season words in a (lowercased) saison string: "printemps/été/automne", ...
+_SAISON_RE = re.compile(r"printemps|été|eté|ete|automne|hiver|toute l'année")
+_SAISON_NAMES = {
+    "printemps": "Printemps",
+    "été": "Été",
+    "eté": "Été",
+    "ete": "Été",
+    "automne": "Automne",
+    "hiver": "Hiver",
+}
 
 
 @dataclass
@@ -67,13 +89,13 @@ def _parse_duree(s: str) -> float | None:
         return None
     s = s.strip().lower().replace(",", ".")
     # 3h06, 2h30, 1h15
-    m = re.match(r"(\d+)\s*h\s*(\d+)?", s)
+    m = _DUREE_HM.match(s)
     if m:
         h = int(m.group(1))
         mn = int(m.group(2) or 0)
         return h + mn / 60.0
     # try just number (hours)
-    m = re.match(r"([\d.]+)\s*h?", s)
+    m = _DUREE_NUM.match(s)
     if m:
         return float(m.group(1))
     return None
@@ -141,31 +163,64 @@ DIFFICULTES = ["Difficulté T1", "Difficulté T2", "Difficulté T3"]
 DENIVELE_RANGES = ["Moins de 500 m", "De 500 à 1000 m", "Plus de 1000 m"]
 # Saisons: "Toute l'année" = toutes les 4. Certaines randonnées ont plusieurs saisons.
 SEASONS = ["Toute l'année", "Printemps", "Été", "Automne", "Hiver"]
+# Canonical season names (capitalization as displayed)
+CANONICAL_SEASONS = frozenset(SEASONS[1:])
+# Hike fields taking their value from a small fixed vocabulary
+CATEGORICAL_FIELDS = (
+    "canton",
+    "type_parcours",
+    "km_range",
+    "duree_range",
+    "environnement",
+    "difficulte",
+    "denivele_range",
+)
+
+
+def parse_saison(saison_str: str | None) -> set[str]:
+    """Parse saison string into set of canonical season names. 'Toute l'année' -> all 4."""
+    if not saison_str or not saison_str.strip():
+        return set()
+    # unicode apostrophe, then one regex pass over the whole string
+    hits = _SAISON_RE.findall(saison_str.lower().replace("\u2019", "'"))
+    if "toute l'année" in hits:
+        return set(CANONICAL_SEASONS)
+    return {_SAISON_NAMES[h] for h in hits}
+
+
+def hike_environnements(h: dict) -> set[str]:
+    """Environnements of a hike (single field + comma-separated list)."""
+    single = (h.get("environnement") or "").strip()
+    multi = (h.get("environnements") or "").strip()
+    hike_envs = {single} if single else set()
+    if multi:
+        hike_envs.update(e.strip() for e in multi.split(",") if e.strip())
+    return hike_envs
 
 
 def _extract_table(soup: BeautifulSoup) -> dict[str, str]:
     """Extract key-value table from a hike post page."""
     result = {}
-    for table in soup.find_all("table"):
-        for row in table.find_all("tr"):
-            cells = row.find_all(["th", "td"])
-            if len(cells) >= 2:
-                key = cells[0].get_text(separator=" ", strip=True)
-                value = cells[1].get_text(separator=" ", strip=True)
-                if key and value:
-                    result[key] = value
+    for row in soup.select("table tr"):
+        # Only the first two cells (key, value) are needed
+        cells = row.find_all(["th", "td"], recursive=False, limit=2)
+        if len(cells) >= 2:
+            key = cells[0].get_text(separator=" ", strip=True)
+            value = cells[1].get_text(separator=" ", strip=True)
+            if key and value:
+                result[key] = value
     return result
 
 
 def _parse_number_km(s: str) -> float | None:
-    m = re.search(r"([\d.,]+)\s*km", s, re.I)
+    m = _NUM_KM.search(s)
     if m:
         return float(m.group(1).replace(",", "."))
     return None
 
 
 def _parse_number_m(s: str) -> int | None:
-    m = re.search(r"([\d\s]+)\s*m", s, re.I)
+    m = _NUM_M.search(s)
     if m:
         return int(m.group(1).replace("\xa0", "").replace(" ", "").strip())
     return None
@@ -173,7 +228,7 @@ def _parse_number_m(s: str) -> int | None:
 
 def parse_hike_page(url: str, html: str) -> Hike:
     """Parse a single hike post HTML into a Hike."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml")
     table = _extract_table(soup)
 
     title = ""
@@ -268,11 +323,23 @@ def parse_hike_page(url: str, html: str) -> Hike:
 
 def get_post_links_from_page(html: str, base: str) -> list[str]:
     """Extract all hike post URLs from a listing page."""
-    soup = BeautifulSoup(html, "html.parser")
+    if not html or not html.strip():
+        return []
+    # Only the hrefs are needed: a single XPath on the lxml tree, no BeautifulSoup
+    try:
+        try:
+            root = lxml.html.fromstring(html)
+        except ValueError:
+            # lxml refuses str input carrying an XML encoding declaration
+            root = lxml.html.fromstring(html.encode("utf-8"))
+    except lxml.etree.ParserError:
+        # no element at all, e.g. a body made only of comments
+        return []
+    hrefs = root.xpath("//a/@href")
     seen = set()
     links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
+    for href in hrefs:
+        href = href.strip()
         path = urlparse(href).path
         if path.endswith("/"):
             path = path[:-1]
@@ -287,56 +354,119 @@ def get_post_links_from_page(html: str, base: str) -> list[str]:
     return links
 
 
-def fetch_all_post_urls(session: requests.Session, max_pages: int = 200) -> list[str]:
-    """Paginate through the main site and collect all post URLs."""
-    all_urls = set()
-    page = 1
-    while page <= max_pages:
+def build_session() -> requests.Session:
+    """
+    HTTP session for the scraper: identifying headers, a connection pool sized for
+    the worker threads, and retries with backoff on transient errors (429, 5xx).
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(
+        {
+            "User-Agent": "RandoScrapper/1.0 (hike browser project; contact for any concern)",
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "fr,en;q=0.9",
+        }
+    )
+    return session
+
+
+def fetch_all_post_urls(
+    session: requests.Session, max_pages: int = 200, max_workers: int = 4
+) -> list[str]:
+    """
+    Paginate through the main site and collect all post URLs.
+    Listing pages are fetched `max_workers` at a time; the walk stops at the
+    first page (in page order) that fails or has no post links.
+    """
+
+    def fetch(page: int) -> tuple[str, list[str] | Exception]:
         url = f"{BASE_URL}/page/{page}/" if page > 1 else BASE_URL + "/"
         try:
             r = session.get(url, timeout=15)
             r.raise_for_status()
+            return url, get_post_links_from_page(r.text, BASE_URL)
         except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            break
-        links = get_post_links_from_page(r.text, BASE_URL)
-        if not links:
-            break
-        for u in links:
-            all_urls.add(u)
-        print(f"Page {page}: found {len(links)} links (total unique: {len(all_urls)})")
-        page += 1
-        time.sleep(0.5)
+            return url, e
+
+    all_urls = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for first in range(1, max_pages + 1, max_workers):
+            pages = range(first, min(first + max_workers, max_pages + 1))
+            for page, (url, links) in zip(pages, executor.map(fetch, pages)):
+                if isinstance(links, Exception):
+                    print(f"Error fetching {url}: {links}")
+                    return sorted(all_urls)
+                if not links:
+                    return sorted(all_urls)
+                all_urls.update(links)
+                print(
+                    f"Page {page}: found {len(links)} links (total unique: {len(all_urls)})"
+                )
+            time.sleep(0.5)
     return sorted(all_urls)
 
 
-def scrape_all(
-    session: requests.Session | None = None, delay: float = 0.7
+class _RateLimiter:
+    """Token bucket: at most `burst` requests may start within any `period` seconds."""
+
+    def __init__(self, burst: int, period: float) -> None:
+        self._tokens = threading.Semaphore(burst)
+        self._period = period
+
+    def wait(self) -> None:
+        self._tokens.acquire()
+        # Hand the token back once the period has elapsed
+        timer = threading.Timer(self._period, self._tokens.release)
+        timer.daemon = True
+        timer.start()
+
+
+def scrape_hikes(
+    session: requests.Session,
+    urls: list[str],
+    delay: float = 0.7,
+    max_workers: int = 4,
 ) -> list[Hike]:
-    """Scrape the whole site and return list of Hike."""
-    session = session or requests.Session()
-    session.headers.update(
-        {
-            "User-Agent": "RandoScrapper/1.0 (hike browser project; contact for any concern)",
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "fr,en;q=0.9",
-        }
-    )
-    urls = fetch_all_post_urls(session)
-    hikes = []
-    for i, url in enumerate(urls):
+    """
+    Fetch and parse hike pages with a thread pool, keeping the order of `urls`.
+    Politeness: at most `max_workers` requests start per `delay` seconds.
+    """
+    limiter = _RateLimiter(max_workers, delay)
+
+    def fetch(url: str) -> Hike | None:
+        limiter.wait()
         try:
             r = session.get(url, timeout=15)
             r.raise_for_status()
-            hike = parse_hike_page(url, r.text)
-            hikes.append(hike)
-            print(f"[{i+1}/{len(urls)}] {hike.title[:50]}...")
+            return parse_hike_page(url, r.text)
         except Exception as e:
             print(f"Error {url}: {e}")
-        time.sleep(delay)
+            return None
+
+    hikes = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, hike in enumerate(executor.map(fetch, urls)):
+            if hike is not None:
+                hikes.append(hike)
+                print(f"[{i+1}/{len(urls)}] {hike.title[:50]}...")
     return hikes
 
 
+def scrape_all(
+    session: requests.Session | None = None, delay: float = 0.7, max_workers: int = 4
+) -> list[Hike]:
+    """Scrape the whole site and return list of Hike."""
+    session = session or build_session()
+    urls = fetch_all_post_urls(session, max_workers=max_workers)
+    return scrape_hikes(session, urls, delay=delay, max_workers=max_workers)
+
+
 def hike_to_row(h: Hike) -> dict:
     """Convert Hike to DB row (flat dict)."""
     return {
@@ -366,6 +496,10 @@ def hike_to_row(h: Hike) -> dict:
     }
 
 
+# Bump together with a migration step in create_schema
+SCHEMA_VERSION = 1
+
+
 def create_schema(conn: sqlite3.Connection) -> None:
     conn.executescript("""
     CREATE TABLE IF NOT EXISTS hikes (
@@ -398,49 +532,80 @@ def create_schema(conn: sqlite3.Connection) -> None:
     CREATE INDEX IF NOT EXISTS idx_denivele_range ON hikes(denivele_range);
     CREATE INDEX IF NOT EXISTS idx_type_parcours ON hikes(type_parcours);
     """)
-    try:
-        conn.execute("ALTER TABLE hikes ADD COLUMN raw_table TEXT")
-    except sqlite3.OperationalError:
-        pass  # column already exists
+    # Migrations run once per DB file, tracked with PRAGMA user_version
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        try:
+            conn.execute("ALTER TABLE hikes ADD COLUMN raw_table TEXT")
+        except sqlite3.OperationalError:
+            pass  # column already exists
+    if version < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 
 def save_hikes_to_db(hikes: list[Hike], db_path: str | Path) -> None:
-    """Write all hikes to SQLite."""
+    """Write all hikes to SQLite in a single transaction."""
     path = Path(db_path)
     path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(path)
     create_schema(conn)
-    row_keys = list(hike_to_row(hikes[0]).keys()) if hikes else []
-    if not row_keys:
+    rows = [hike_to_row(h) for h in hikes]
+    if not rows:
         conn.close()
         return
+    row_keys = list(rows[0])
     placeholders = ",".join("?" * len(row_keys))
     columns = ",".join(row_keys)
-    conn.executemany(
-        f"INSERT OR REPLACE INTO hikes ({columns}) VALUES ({placeholders})",
-        [tuple(hike_to_row(h).values()) for h in hikes],
-    )
-    conn.commit()
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:  # one BEGIN ... COMMIT for the whole batch
+        conn.executemany(
+            f"INSERT OR REPLACE INTO hikes ({columns}) VALUES ({placeholders})",
+            # Values picked by column name, not by dict insertion order
+            [tuple(r[k] for k in row_keys) for r in rows],
+        )
     conn.close()
     print(f"Saved {len(hikes)} hikes to {path}")
 
 
+def _hike_from_row(d: dict) -> dict:
+    """
+    Turn a stored SQLite row into a hike dict. The raw_table JSON is
+    kept unparsed as `raw_table_json` (see hike_raw_table); adds the parsed season
+    set (`_season_set`) and environnements (`_envs`).
+    """
+    raw = d.pop("raw_table", None)
+    d["raw_table_json"] = raw if isinstance(raw, str) and raw else None
+    # Few distinct values across all hikes: share one str object per value
+    for key in CATEGORICAL_FIELDS:
+        if isinstance(d.get(key), str):
+            d[key] = sys.intern(d[key])
+    # Parsed once here so filtering never re-parses the raw strings
+    d["_season_set"] = frozenset(parse_saison(d.get("saison")))
+    d["_envs"] = frozenset(hike_environnements(d))
+    return d
+
+
+def hike_raw_table(d: dict) -> dict:
+    """
+    Site info table of a loaded hike, parsed from `raw_table_json` on first use.
+    Anything that is not a dict (bad JSON, a JSON list, ...) is stored as {}.
+    """
+    raw = d.get("raw_table")
+    if raw is None:
+        try:
+            raw = json.loads(d.get("raw_table_json") or "{}")
+        except json.JSONDecodeError:
+            raw = {}
+    if not isinstance(raw, dict):
+        raw = {}
+    d["raw_table"] = raw
+    return raw
+
+
 def load_hikes_from_db(db_path: str | Path) -> list[dict]:
-    """Load all hikes from SQLite as list of dicts. Parses raw_table JSON when present."""
+    """Load all hikes from SQLite as list of dicts (see _hike_from_row)."""
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     rows = conn.execute("SELECT * FROM hikes").fetchall()
     conn.close()
-    out = []
-    for r in rows:
-        d = dict(r)
-        raw = d.get("raw_table")
-        if isinstance(raw, str) and raw:
-            try:
-                d["raw_table"] = json.loads(raw)
-            except json.JSONDecodeError:
-                d["raw_table"] = {}
-        elif not isinstance(d.get("raw_table"), dict):
-            d["raw_table"] = {}
-        out.append(d)
-    return out
+    return [_hike_from_row(dict(r)) for r in rows]
@@ -3,18 +3,16 @@
 
 import argparse
 import sys
-import time
 from pathlib import Path
 
 # Allow importing rando_scrapper from repo root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-import requests
-
 from rando_scrapper.scraper import (
+    build_session,
     fetch_all_post_urls,
-    parse_hike_page,
     save_hikes_to_db,
+    scrape_hikes,
 )
 
 DEFAULT_DB = Path(__file__).resolve().parent.parent / "data" / "hikes.db"
@@ -33,39 +31,28 @@ def main():
     parser.add_argument(
         "--delay", type=float, default=0.8, help="Delay between requests (seconds)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Parallel downloads (at most this many requests per --delay)",
+    )
     parser.add_argument(
         "-o", "--output", type=Path, default=DEFAULT_DB, help="Output DB path"
     )
     args = parser.parse_args()
 
-    session = requests.Session()
-    session.headers.update(
-        {
-            "User-Agent": "RandoScrapper/1.0 (hike browser project)",
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "fr,en;q=0.9",
-        }
-    )
+    session = build_session()
 
     print("Fetching post URLs...")
     max_pages = args.max_pages or 200
-    urls = fetch_all_post_urls(session, max_pages=max_pages)
+    urls = fetch_all_post_urls(session, max_pages=max_pages, max_workers=args.workers)
     if args.max_hikes and len(urls) > args.max_hikes:
         urls = urls[: args.max_hikes]
         print(f"Limiting to first {len(urls)} hikes.")
     print(f"Found {len(urls)} hike URLs.")
 
-    hikes = []
-    for i, url in enumerate(urls):
-        try:
-            r = session.get(url, timeout=15)
-            r.raise_for_status()
-            hike = parse_hike_page(url, r.text)
-            hikes.append(hike)
-            print(f"[{i+1}/{len(urls)}] {hike.title[:55]}...")
-        except Exception as e:
-            print(f"Error {url}: {e}")
-        time.sleep(args.delay)
+    hikes = scrape_hikes(session, urls, delay=args.delay, max_workers=args.workers)
 
     if not hikes:
         print("No hikes scraped. Check the site or your connection.")
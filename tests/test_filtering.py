@@ -0,0 +1,67 @@
+"""Tests for rando_scrapper.filtering."""
+
+import inspect
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rando_scrapper.filtering import (
+    FILTERS,
+    build_indices,
+    filter_hikes,
+    filter_hikes_indexed,
+    filter_options,
+    hikes_frame,
+)
+from rando_scrapper.scraper import load_hikes_from_db
+
+DB_PATH = Path(__file__).resolve().parent.parent / "data" / "hikes.db"
+
+
+@pytest.fixture(scope="module")
+def hikes():
+    if not DB_PATH.exists():
+        pytest.skip(f"{DB_PATH} not found")
+    return load_hikes_from_db(DB_PATH)
+
+
+def test_indexed_filter_matches_list_filter(hikes):
+    index = build_indices(hikes_frame(hikes))
+    options = filter_options()
+    rng = random.Random(0)
+    for _ in range(2000):
+        selections = {
+            arg: rng.sample(options[label], rng.randint(1, min(3, len(options[label]))))
+            for label, _, arg in FILTERS
+            if rng.random() < 0.35
+        }
+        expected = [h["url"] for h in filter_hikes(hikes, **selections)]
+        mask = filter_hikes_indexed(index, **selections)
+        assert [hikes[i]["url"] for i in np.flatnonzero(mask)] == expected, selections
+
+
+def test_no_selection_keeps_everything(hikes):
+    index = build_indices(hikes_frame(hikes))
+    assert filter_hikes(hikes) == hikes
+    assert filter_hikes_indexed(index).all()
+
+
+def test_filter_hikes_plain_dicts():
+    hikes = [
+        {"canton": "Vaud", "saison": "Hiver"},
+        {"canton": "Valais", "saison": "Printemps/été", "environnement": "Lac"},
+        {"canton": "Vaud", "saison": "Toute l’année", "environnements": "Lac, Forêt"},
+    ]
+    assert filter_hikes(hikes, saisons=["Hiver"]) == [hikes[0], hikes[2]]
+    assert filter_hikes(hikes, saisons=["Toute l'année"]) == [hikes[2]]
+    assert filter_hikes(hikes, environnements=["Lac"]) == [hikes[1], hikes[2]]
+    assert filter_hikes(hikes, cantons=["Vaud"], environnements=["Forêt"]) == [hikes[2]]
+
+
+def test_filters_cover_filter_options_and_arguments():
+    assert [label for label, _, _ in FILTERS] == list(filter_options())
+    args = {arg for _, _, arg in FILTERS}
+    assert args == set(inspect.signature(filter_hikes).parameters) - {"hikes"}
+    assert args == set(inspect.signature(filter_hikes_indexed).parameters) - {"index"}
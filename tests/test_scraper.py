@@ -0,0 +1,229 @@
+"""Tests for rando_scrapper.scraper."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from rando_scrapper.scraper import (
+    BASE_URL,
+    CANONICAL_SEASONS,
+    Hike,
+    _RateLimiter,
+    fetch_all_post_urls,
+    get_post_links_from_page,
+    hike_raw_table,
+    load_hikes_from_db,
+    parse_saison,
+    save_hikes_to_db,
+    scrape_hikes,
+)
+
+ALL_THREE = {"Printemps", "Été", "Automne"}
+
+
+@pytest.mark.parametrize(
+    ("saison", "expected"),
+    [
+        ("Printemps/été/automne", ALL_THREE),
+        ("Printemps / été / Automne", ALL_THREE),
+        ("Printemps – été – automne", ALL_THREE),
+        ("Printemps, été, automne", ALL_THREE),
+        ("Printemps, été automne", ALL_THREE),
+        ("Eté/automne", {"Été", "Automne"}),
+        ("Toute l’année", set(CANONICAL_SEASONS)),
+        ("Toute l'année", set(CANONICAL_SEASONS)),
+        ("Hivernal", {"Hiver"}),
+        ("Hiver (raquettes non nécessaires)", {"Hiver"}),
+        ("Toutes saisons", set()),
+        ("Gorges ouvertes de mai à octobre", set()),
+        ("", set()),
+        (None, set()),
+    ],
+)
+def test_parse_saison(saison, expected):
+    assert parse_saison(saison) == expected
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "",
+        "   ",
+        "<!-- nothing here -->",
+        '<?xml version="1.0" encoding="utf-8"?><html><body></body></html>',
+    ],
+)
+def test_get_post_links_from_page_without_links(html):
+    assert get_post_links_from_page(html, "https://randoromandie.com") == []
+
+
+def test_get_post_links_from_page_xml_declaration():
+    html = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<html><body><a href="/2021/05/03/some-hike/">x</a></body></html>'
+    )
+    assert get_post_links_from_page(html, "https://randoromandie.com") == [
+        "https://randoromandie.com/2021/05/03/some-hike"
+    ]
+
+
+@pytest.mark.parametrize(
+    "hike",
+    [
+        {"raw_table_json": "[1, 2]"},
+        {"raw_table_json": '"text"'},
+        {"raw_table_json": "{not json"},
+        {"raw_table_json": None},
+        {"raw_table": "Canton: Vaud"},
+        {"raw_table": ["Canton", "Vaud"]},
+    ],
+)
+def test_hike_raw_table_non_dict(hike):
+    assert hike_raw_table(hike) == {}
+    assert hike["raw_table"] == {}
+
+
+def test_hike_raw_table_parses_once():
+    hike = {"raw_table_json": '{"Canton": "Vaud"}'}
+    assert hike_raw_table(hike) == {"Canton": "Vaud"}
+    hike["raw_table_json"] = None
+    assert hike_raw_table(hike) is hike["raw_table"]
+    assert hike["raw_table"] == {"Canton": "Vaud"}
+
+
+class FakeResponse:
+    def __init__(self, text: str, status_code: int = 200) -> None:
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeSession:
+    """
+    Serves canned pages by URL: a str is the page body, an int an HTTP error status,
+    an exception is raised. Records when each request started.
+    """
+
+    def __init__(self, pages: dict, latency: dict | None = None) -> None:
+        self.pages = pages
+        self.latency = latency or {}
+        self.started: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout: float | None = None) -> FakeResponse:
+        with self._lock:
+            self.started.append((time.monotonic(), url))
+        time.sleep(self.latency.get(url, 0))
+        page = self.pages.get(url, 404)
+        if isinstance(page, Exception):
+            raise page
+        if isinstance(page, int):
+            return FakeResponse("", page)
+        return FakeResponse(page)
+
+
+def _hike_page(title: str) -> str:
+    return f"<html><body><h1>{title}</h1></body></html>"
+
+
+def test_rate_limiter_burst_then_wait():
+    limiter = _RateLimiter(burst=3, period=0.2)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait()
+    assert time.monotonic() - start < 0.1
+    limiter.wait()
+    assert time.monotonic() - start >= 0.19
+
+
+def test_scrape_hikes_keeps_url_order_and_skips_failures():
+    urls = [f"{BASE_URL}/2024/01/0{i}/hike-{i}/" for i in range(1, 7)]
+    pages = {url: _hike_page(f"Hike {i}") for i, url in enumerate(urls, 1)}
+    pages[urls[1]] = 500
+    pages[urls[4]] = requests.ConnectionError("boom")
+    # Later URLs answer first, so completion order is the reverse of urls
+    latency = {url: 0.05 * (len(urls) - i) for i, url in enumerate(urls)}
+    session = FakeSession(pages, latency)
+
+    hikes = scrape_hikes(session, urls, delay=0.01, max_workers=3)
+
+    assert [h.title for h in hikes] == ["Hike 1", "Hike 3", "Hike 4", "Hike 6"]
+    assert [h.url for h in hikes] == [urls[0], urls[2], urls[3], urls[5]]
+    assert sorted(url for _, url in session.started) == sorted(urls)
+
+
+def test_scrape_hikes_rate_limit():
+    urls = [f"{BASE_URL}/2024/01/0{i}/hike-{i}/" for i in range(1, 7)]
+    session = FakeSession({url: _hike_page(url) for url in urls})
+    delay, max_workers = 0.2, 2
+
+    scrape_hikes(session, urls, delay=delay, max_workers=max_workers)
+
+    starts = sorted(t for t, _ in session.started)
+    # Any max_workers + 1 consecutive starts span at least one delay
+    for earlier, later in zip(starts, starts[max_workers:]):
+        assert later - earlier >= delay - 0.05
+
+
+def _listing_page(*slugs: str) -> str:
+    links = "".join(f'<a href="{BASE_URL}/2024/01/01/{s}/">{s}</a>' for s in slugs)
+    return f"<html><body>{links}</body></html>"
+
+
+def _listing_url(page: int) -> str:
+    return f"{BASE_URL}/page/{page}/" if page > 1 else BASE_URL + "/"
+
+
+@pytest.mark.parametrize("stop_page", [404, requests.ConnectionError("boom"), ""])
+def test_fetch_all_post_urls_stops_at_first_bad_page(monkeypatch, stop_page):
+    monkeypatch.setattr(
+        "rando_scrapper.scraper.time", SimpleNamespace(sleep=lambda _: None)
+    )
+    pages = {_listing_url(p): _listing_page(f"hike-{p}") for p in range(1, 11)}
+    # Page 6 fails or is empty; pages 7 and 8 are fetched in the same chunk
+    pages[_listing_url(6)] = stop_page
+    session = FakeSession(pages)
+
+    urls = fetch_all_post_urls(session, max_pages=10, max_workers=4)
+
+    assert urls == sorted(f"{BASE_URL}/2024/01/01/hike-{p}" for p in range(1, 6))
+    requested = {url for _, url in session.started}
+    assert requested == {_listing_url(p) for p in range(1, 9)}
+
+
+def test_fetch_all_post_urls_respects_max_pages(monkeypatch):
+    monkeypatch.setattr(
+        "rando_scrapper.scraper.time", SimpleNamespace(sleep=lambda _: None)
+    )
+    pages = {_listing_url(p): _listing_page(f"hike-{p}") for p in range(1, 11)}
+    session = FakeSession(pages)
+
+    urls = fetch_all_post_urls(session, max_pages=5, max_workers=4)
+
+    assert len(urls) == 5
+    assert {url for _, url in session.started} == {_listing_url(p) for p in range(1, 6)}
+
+
+def test_save_and_load_hikes_round_trip(tmp_path):
+    db = tmp_path / "hikes.db"
+    hike = Hike(
+        url=f"{BASE_URL}/2024/01/01/a/",
+        title="A",
+        canton="Vaud",
+        saison="Printemps/été",
+        environnements=["Lac", "Forêt"],
+        raw_table={"Canton": "Vaud"},
+    )
+    save_hikes_to_db([hike], db)
+
+    [loaded] = load_hikes_from_db(db)
+    assert (loaded["url"], loaded["title"], loaded["canton"]) == (hike.url, "A", "Vaud")
+    assert loaded["_season_set"] == {"Printemps", "Été"}
+    assert loaded["_envs"] == {"Lac", "Forêt"}
+    assert hike_raw_table(loaded) == {"Canton": "Vaud"}